@@ -0,0 +1,126 @@
+"""
+Per-frame processing for the research collector
+
+Fully annotated and free of stream/file setup so it can be compiled with mypyc
+(``mypyc _sse_loop.py``); it runs unchanged as plain Python when it is not.
+"""
+
+import hashlib
+import json
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Set
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib codec
+    orjson = None  # type: ignore[assignment]
+
+
+def _dumps_line(obj: Any) -> bytes:
+    """Serialize an object to one compact JSON Lines record"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj).encode("utf-8") + b"\n"
+
+
+def _graph_fingerprint(adj_list: Dict[str, Any]) -> bytes:
+    """Short digest of an adjacency list, used to spot graph changes between frames"""
+    if orjson is not None:
+        encoded = orjson.dumps(adj_list, option=orjson.OPT_SORT_KEYS)
+    else:
+        encoded = json.dumps(adj_list, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=8).digest()
+
+
+def _graph_delta(prev: Dict[str, Any], adj_list: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Nodes whose neighbour lists changed since the previous graph, and nodes dropped
+    from it. Replaying a delta keeps surviving nodes in place and appends new ones;
+    when the graph's node order differs from that, the delta also carries it
+    """
+    removed: List[str] = [node for node in prev if node not in adj_list]
+    delta: Dict[str, Any] = {
+        "nodes": {
+            node: neighbors for node, neighbors in adj_list.items()
+            if prev.get(node) != neighbors
+        },
+        "removed": removed,
+    }
+    order: List[str] = list(adj_list)
+    replayed: List[str] = [node for node in prev if node in adj_list]
+    replayed.extend(node for node in order if node not in prev)
+    if replayed != order:
+        delta["order"] = order
+    return delta
+
+
+class SseState:
+    """Running state of one collected stream"""
+
+    def __init__(
+        self,
+        write_graph: Callable[[bytes], Any],
+        formatted: bytearray,
+        references: Dict[str, Any],
+    ) -> None:
+        self.write_graph = write_graph
+        # Thought lines are encoded into this buffer; the collector drains it to disk
+        self.formatted = formatted
+        self.references = references
+        self.total: int = 0
+        self.current_thought: str = ""
+        self.prev_fp: bytes = b""
+        self.final_graph: Dict[str, Any] = {}
+        self.unique_nodes: Set[str] = set()
+
+
+def process_frame(data: Any, state: SseState) -> None:
+    """Fold one parsed frame into the session state and files"""
+    total: int = state.total + 1
+    state.total = total
+
+    # Extract useful info; most frames carry no formatted payload, and anything
+    # that is not an object at some level (plain text, lists) is skipped
+    resp = data.get('response') if isinstance(data, dict) else None
+    formatted_data = resp.get('formatted') if isinstance(resp, dict) else None
+    if not formatted_data or not isinstance(formatted_data, dict):
+        return
+
+    # Track graph evolution
+    adj_list = formatted_data.get('adjacency_list')
+    if adj_list and isinstance(adj_list, dict):
+        fingerprint: bytes = _graph_fingerprint(adj_list)
+        if fingerprint != state.prev_fp:
+            state.prev_fp = fingerprint
+            # Stored graphs and unique_nodes share one str object per node name
+            adj_list = {sys.intern(node): neighbors for node, neighbors in adj_list.items()}
+            state.unique_nodes.update(adj_list.keys())
+            state.write_graph(_dumps_line({
+                "timestamp": datetime.now().isoformat(),
+                "response_count": total,
+                "delta": _graph_delta(state.final_graph, adj_list)
+            }))
+            state.final_graph = adj_list
+
+    # Track references
+    ref2url = formatted_data.get('ref2url')
+    if ref2url and isinstance(ref2url, dict):
+        state.references.update(ref2url)
+
+    # Build thought stream
+    thought = formatted_data.get('thought')
+    new_thought: str = str(thought) if thought else ""
+    if new_thought and new_thought != state.current_thought:
+        state.current_thought = new_thought
+
+        # Encode every part first and append the line in one step, so a part that
+        # fails to encode leaves nothing half-written in the output buffer
+        tool_type = formatted_data.get('tool_type')
+        prefix: bytes = b"[%b] " % str(tool_type).encode("utf-8") if tool_type else b""
+        buf: bytearray = state.formatted
+        buf += b"[%04d] %b%b\n" % (total, prefix, new_thought.encode("utf-8"))
+
+        # Print progress
+        if total % 50 == 0:
+            print(f"📊 Collected {total} responses...")
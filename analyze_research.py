@@ -6,28 +6,179 @@ Analyze collected research data from MindSearch sessions
 
 import json
 import os
+import sys
+from array import array
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib codec
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:  # simdjson is optional as well
+    simdjson = None
+
+try:
+    import zstandard
+except ImportError:  # only needed for compressed raw streams
+    zstandard = None
+
+
+def _loads(data):
+    """Parse a JSON document from bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj):
+    """Serialize an object to indented JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode("utf-8")
+
+
+def _read_json_bytes(path):
+    """Read a whole file with one os.read, bypassing the buffered text stack"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size)
+        while len(data) < size:  # Short reads are rare on regular files
+            chunk = os.read(fd, size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+    finally:
+        os.close(fd)
+
+
+def _load_jsonl(path):
+    """Parse every record of a JSON Lines file in one pass over its bytes"""
+    if path.suffix == ".zst":
+        with open(path, 'rb') as f, zstandard.ZstdDecompressor().stream_reader(f) as reader:
+            data = reader.read()
+    else:
+        data = path.read_bytes()
+    lines = [line for line in data.split(b"\n") if line and line != b"\r"]
+    if orjson is None and simdjson is not None:
+        # A single parser reuses its internal buffers across all lines
+        parse = simdjson.Parser().parse
+        return [parse(line, True) for line in lines]
+    loads = orjson.loads if orjson is not None else json.loads
+    return [loads(line) for line in lines]
+
+
+def _expand_graph_deltas(records):
+    """Rebuild the full adjacency list of every state from streamed graph deltas"""
+    graph = {}
+    states = []
+    for record in records:
+        delta = record.get("delta")
+        if delta is None:  # A full snapshot
+            graph = dict(record["adjacency_list"])
+            states.append(record)
+            continue
+        for node in delta["removed"]:
+            graph.pop(node, None)
+        graph.update(delta["nodes"])
+        order = delta.get("order")
+        if order is not None:  # Node order changed beyond removals and appends
+            graph = {node: graph[node] for node in order}
+        states.append({
+            "timestamp": record["timestamp"],
+            "response_count": record["response_count"],
+            "adjacency_list": dict(graph)
+        })
+    return states
+
+
+def _intern_graph(adjacency_list):
+    """Return the adjacency list with every node name interned"""
+    intern = sys.intern
+    graph = {}
+    for node, neighbors in adjacency_list.items():
+        for i, neighbor in enumerate(neighbors):
+            if isinstance(neighbor, str):
+                neighbors[i] = intern(neighbor)
+            elif isinstance(neighbor, dict) and isinstance(neighbor.get("name"), str):
+                neighbor["name"] = intern(neighbor["name"])
+        graph[intern(node)] = neighbors
+    return graph
+
+
+@dataclass
+class _GraphEvolution:
+    """Node lists of every graph state, flattened into parallel arrays"""
+    node_names: list = field(default_factory=list)
+    node_index: dict = field(default_factory=dict)
+    state_offsets: array = field(default_factory=lambda: array('i', [0]))
+    node_ids: array = field(default_factory=lambda: array('i'))
+
+    def nodes_at(self, k):
+        """Names of the nodes present in state k"""
+        names = self.node_names
+        start, end = self.state_offsets[k], self.state_offsets[k + 1]
+        return [names[i] for i in self.node_ids[start:end]]
+
+
+def _graph_evolution_to_soa(graph_evolution):
+    """Build a _GraphEvolution from the on-disk list of states"""
+    soa = _GraphEvolution()
+    node_index, node_names = soa.node_index, soa.node_names
+    node_ids = soa.node_ids
+    for state in graph_evolution:
+        for name in state['adjacency_list']:
+            idx = node_index.get(name)
+            if idx is None:
+                idx = node_index[name] = len(node_names)
+                node_names.append(name)
+            node_ids.append(idx)
+        soa.state_offsets.append(len(node_ids))
+    return soa
+
+
+def _load_metadata(metadata_file):
+    """Load a session's metadata.json, or None if the session has none"""
+    try:
+        return _loads(_read_json_bytes(metadata_file))
+    except FileNotFoundError:
+        return None
+
+
 class ResearchAnalyzer:
     def __init__(self, research_dir="research_outputs"):
         self.research_dir = Path(research_dir)
     
+    def _iter_sessions(self):
+        """Yield (name, path, load_metadata) for each session without reading its metadata"""
+        if not self.research_dir.exists():
+            return
+        # DirEntry caches its type from the directory listing, so no extra stat() per entry
+        with os.scandir(self.research_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    metadata_file = os.path.join(entry.path, "metadata.json")
+                    yield entry.name, entry.path, partial(_load_metadata, metadata_file)
+
     def list_sessions(self):
         """List all available research sessions"""
         sessions = []
-        if self.research_dir.exists():
-            for session_path in self.research_dir.iterdir():
-                if session_path.is_dir():
-                    metadata_file = session_path / "metadata.json"
-                    if metadata_file.exists():
-                        with open(metadata_file) as f:
-                            metadata = json.load(f)
-                        sessions.append({
-                            "name": session_path.name,
-                            "path": session_path,
-                            "metadata": metadata
-                        })
+        for name, path, load_metadata in self._iter_sessions():
+            metadata = load_metadata()
+            if metadata is not None:
+                sessions.append({
+                    "name": name,
+                    "path": Path(path),
+                    "metadata": metadata
+                })
         return sorted(sessions, key=lambda x: x["metadata"].get("start_time", ""))
     
     def analyze_session(self, session_name):
@@ -39,38 +190,54 @@ class ResearchAnalyzer:
         
         # Load metadata
         metadata_file = session_path / "metadata.json"
-        with open(metadata_file) as f:
-            metadata = json.load(f)
+        metadata = _loads(_read_json_bytes(metadata_file))
         
         # Load graph evolution
-        graph_file = session_path / "graph_evolution.json"
+        graph_file = session_path / "graph_evolution.jsonl"
+        legacy_graph_file = session_path / "graph_evolution.json"
         graph_evolution = []
         if graph_file.exists():
-            with open(graph_file) as f:
-                graph_evolution = json.load(f)
+            graph_evolution = _expand_graph_deltas(_load_jsonl(graph_file))
+        elif legacy_graph_file.exists():
+            # Sessions collected before graph states were streamed as JSON Lines
+            graph_evolution = _loads(_read_json_bytes(legacy_graph_file))
         
-        print(f"📊 Analysis for: {session_name}")
-        print("=" * 60)
-        print(f"Query: {metadata['query']}")
-        print(f"Duration: {metadata.get('start_time', 'Unknown')} to {metadata.get('end_time', 'Unknown')}")
-        print(f"Total responses: {metadata['total_responses']}")
-        print(f"Unique nodes: {len(metadata['unique_nodes'])}")
-        print(f"References: {len(metadata.get('references', {}))}")
+        # Node names repeat across every state; interning makes each one a single
+        # shared object so later comparisons and dict lookups hit by identity
+        for state in graph_evolution:
+            state['adjacency_list'] = _intern_graph(state['adjacency_list'])
+        metadata['unique_nodes'] = [sys.intern(n) for n in metadata['unique_nodes']]
+        if metadata.get('final_graph'):
+            metadata['final_graph'] = _intern_graph(metadata['final_graph'])
+        
+        out = [
+            f"📊 Analysis for: {session_name}",
+            "=" * 60,
+            f"Query: {metadata['query']}",
+            f"Duration: {metadata.get('start_time', 'Unknown')} to {metadata.get('end_time', 'Unknown')}",
+            f"Total responses: {metadata['total_responses']}",
+            f"Unique nodes: {len(metadata['unique_nodes'])}",
+            f"References: {len(metadata.get('references', {}))}",
+        ]
         
         if metadata['unique_nodes']:
-            print(f"\nNodes created: {', '.join(metadata['unique_nodes'])}")
+            out.append(f"\nNodes created: {', '.join(metadata['unique_nodes'])}")
         
         if metadata.get('references'):
-            print(f"\nReferences found:")
+            out.append(f"\nReferences found:")
             for ref, url in metadata['references'].items():
-                print(f"  [{ref}] {url}")
+                out.append(f"  [{ref}] {url}")
         
         # Graph evolution analysis
         if graph_evolution:
-            print(f"\nGraph Evolution ({len(graph_evolution)} states):")
-            for i, state in enumerate(graph_evolution):
-                nodes = list(state['adjacency_list'].keys())
-                print(f"  State {i+1}: {len(nodes)} nodes - {', '.join(nodes)}")
+            out.append(f"\nGraph Evolution ({len(graph_evolution)} states):")
+            soa = _graph_evolution_to_soa(graph_evolution)
+            for i in range(len(graph_evolution)):
+                nodes = soa.nodes_at(i)
+                out.append(f"  State {i+1}: {len(nodes)} nodes - {', '.join(nodes)}")
+        
+        # One write for the whole report instead of a print() per line
+        sys.stdout.write("\n".join(out) + "\n")
         
         return {
             "metadata": metadata,
@@ -89,33 +256,33 @@ class ResearchAnalyzer:
             print("❌ No graph data to visualize")
             return
 
-        print(f"\n📊 Graph Structure for {session_name}:")
-        print("=" * 50)
+        out = [f"\n📊 Graph Structure for {session_name}:", "=" * 50]
 
         # Simple text visualization
         for node, connections in final_graph.items():
-            print(f"📍 {node}")
+            out.append(f"📍 {node}")
             if connections:
                 for conn in connections:
-                    print(f"  └─→ {conn}")
+                    out.append(f"  └─→ {conn}")
             else:
-                print(f"  └─→ (no connections)")
-            print()
+                out.append(f"  └─→ (no connections)")
+            out.append("")
+        sys.stdout.write("\n".join(out) + "\n")
 
         # Save as text file
         if save_plot:
             graph_file = analysis["session_path"] / "graph_structure.txt"
-            with open(graph_file, 'w') as f:
-                f.write(f"Graph Structure for {session_name}\n")
-                f.write("=" * 50 + "\n\n")
-                for node, connections in final_graph.items():
-                    f.write(f"{node}:\n")
-                    if connections:
-                        for conn in connections:
-                            f.write(f"  -> {conn}\n")
-                    else:
-                        f.write(f"  -> (no connections)\n")
-                    f.write("\n")
+            lines = [f"Graph Structure for {session_name}", "=" * 50, ""]
+            for node, connections in final_graph.items():
+                lines.append(f"{node}:")
+                if connections:
+                    for conn in connections:
+                        lines.append(f"  -> {conn}")
+                else:
+                    lines.append(f"  -> (no connections)")
+                lines.append("")
+            with open(graph_file, 'w', buffering=1 << 20) as f:
+                f.write("\n".join(lines) + "\n")
             print(f"📊 Graph structure saved: {graph_file}")
     
     def export_for_training(self, session_name, output_file=None):
@@ -126,13 +293,15 @@ class ResearchAnalyzer:
         
         session_path = analysis["session_path"]
         
-        # Load raw stream data
-        raw_file = session_path / "raw_stream.jsonl"
+        # Load raw stream data, zstd-compressed by newer collectors
+        raw_file = session_path / "raw_stream.jsonl.zst"
+        if not raw_file.exists():
+            raw_file = session_path / "raw_stream.jsonl"
         raw_responses = []
-        if raw_file.exists():
-            with open(raw_file) as f:
-                for line in f:
-                    raw_responses.append(json.loads(line.strip()))
+        if raw_file.suffix == ".zst" and zstandard is None:
+            print(f"⚠️  Install zstandard to read {raw_file.name}, skipping the response stream")
+        elif raw_file.exists():
+            raw_responses = _load_jsonl(raw_file)
         
         # Create training-friendly format
         training_data = {
@@ -146,28 +315,35 @@ class ResearchAnalyzer:
             "reasoning_steps": []
         }
         
-        # Extract reasoning steps
+        # Extract reasoning steps, skipping repeated thoughts before anything is
+        # allocated; the step dicts are only built from the collected columns
+        steps_thought, steps_tool, steps_graph = [], [], []
         current_thought = ""
         for response in raw_responses:
-            if 'response' in response and response['response']:
-                formatted = response['response'].get('formatted', {})
-                if 'thought' in formatted:
-                    thought = formatted['thought']
-                    if thought and thought != current_thought:
-                        training_data["reasoning_steps"].append({
-                            "step": len(training_data["reasoning_steps"]) + 1,
-                            "thought": thought,
-                            "tool_type": formatted.get('tool_type'),
-                            "graph_state": formatted.get('adjacency_list', {})
-                        })
-                        current_thought = thought
+            # Frames that are not objects at some level (plain text, lists) are skipped
+            resp = response.get('response') if isinstance(response, dict) else None
+            formatted = resp.get('formatted') if isinstance(resp, dict) else None
+            if not formatted or not isinstance(formatted, dict):
+                continue
+            thought = formatted.get('thought')
+            if not thought or thought == current_thought:
+                continue
+            current_thought = thought
+            steps_thought.append(thought)
+            steps_tool.append(formatted.get('tool_type'))
+            steps_graph.append(formatted.get('adjacency_list', {}))
+        training_data["reasoning_steps"] = [
+            {"step": step, "thought": thought, "tool_type": tool_type, "graph_state": graph_state}
+            for step, (thought, tool_type, graph_state)
+            in enumerate(zip(steps_thought, steps_tool, steps_graph), 1)
+        ]
         
         # Save training data
         if output_file is None:
             output_file = session_path / "training_data.json"
         
-        with open(output_file, 'w') as f:
-            json.dump(training_data, f, indent=2)
+        with open(output_file, 'wb') as f:
+            f.write(_dumps(training_data))
         
         print(f"📚 Training data exported: {output_file}")
         print(f"   - {len(training_data['reasoning_steps'])} reasoning steps")
@@ -176,43 +352,71 @@ class ResearchAnalyzer:
         
         return training_data
 
+
+# Only the most recent sessions are printed in the listing; any session number
+# can still be entered
+MAX_LISTED_SESSIONS = 20
+
+
 def main():
     analyzer = ResearchAnalyzer()
     
+    # Sessions are numbered oldest first by start_time, the same order as
+    # list_sessions(). The ordering needs every metadata.json, so each one is read
+    # once here and reused for the listing
     sessions = analyzer.list_sessions()
     if not sessions:
         print("❌ No research sessions found. Run research_collector.py first!")
+        return 1
+    
+    from_argv = len(sys.argv) > 1
+    if from_argv:
+        # Session number given on the command line: skip the listing entirely
+        choice = sys.argv[1]
+    else:
+        first = max(len(sessions) - MAX_LISTED_SESSIONS, 0)
+        print("📊 Available Research Sessions:")
+        print("=" * 50)
+        if first:
+            print(f"(sessions 1-{first} are older and not shown, but can still be chosen)\n")
+        for i, session in enumerate(islice(sessions, first, None), first + 1):
+            meta = session["metadata"]
+            print(f"{i}. {session['name']}")
+            print(f"   Query: {meta['query'][:60]}...")
+            print(f"   Responses: {meta['total_responses']}, Nodes: {len(meta['unique_nodes'])}")
+            print()
+        
+        choice = input("Enter session number to analyze: ").strip()
+    
+    # Parse the choice once; anything that is not a number counts as out of range
+    try:
+        number = int(choice)
+    except ValueError:
+        number = 0
+    if not 1 <= number <= len(sessions):
+        if from_argv:
+            print(f"❌ Invalid session number: {choice} (choose 1-{len(sessions)})")
+            return 1
         return
+    name = sessions[number - 1]["name"]
     
-    print("📊 Available Research Sessions:")
-    print("=" * 50)
-    for i, session in enumerate(sessions, 1):
-        meta = session["metadata"]
-        print(f"{i}. {session['name']}")
-        print(f"   Query: {meta['query'][:60]}...")
-        print(f"   Responses: {meta['total_responses']}, Nodes: {len(meta['unique_nodes'])}")
-        print()
+    print(f"\n🔍 Analyzing: {name}")
+    analyzer.analyze_session(name)
     
-    choice = input("Enter session number to analyze: ").strip()
-    if choice.isdigit() and 1 <= int(choice) <= len(sessions):
-        session = sessions[int(choice) - 1]
-        
-        print(f"\n🔍 Analyzing: {session['name']}")
-        analyzer.analyze_session(session['name'])
-        
-        # Ask for additional actions
-        print("\nAdditional actions:")
-        print("1. Show graph structure")
-        print("2. Export training data")
-        print("3. Both")
+    # Ask for additional actions
+    print("\nAdditional actions:")
+    print("1. Show graph structure")
+    print("2. Export training data")
+    print("3. Both")
+
+    action = input("Choose action (1-3, or Enter to skip): ").strip()
 
-        action = input("Choose action (1-3, or Enter to skip): ").strip()
+    if action in ['1', '3']:
+        analyzer.visualize_graph(name)
 
-        if action in ['1', '3']:
-            analyzer.visualize_graph(session['name'])
+    if action in ['2', '3']:
+        analyzer.export_for_training(name)
 
-        if action in ['2', '3']:
-            analyzer.export_for_training(session['name'])
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,31 +1,79 @@
 import json
+import logging
 
-import requests
+import httpx
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional, json.loads accepts bytes as well
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
 
 # Define the backend URL
 url = "http://localhost:8005/solve"
 headers = {"Content-Type": "application/json"}
 
+# SSE framing tokens, compared against the raw bytes before any decoding
+_DATA = b"data: "
+_DATA_LEN = len(_DATA)
+_COMMENT = b":"
+_CR = b"\r"
+
+
+def _sse_payload(line):
+    return line
+
+
+def _sse_data(line):
+    return line[_DATA_LEN:] if line.startswith(_DATA) else line
+
+
+def _sse_skip(line):
+    return None
+
+
+# SSE line handlers indexed by the first byte of the line: "data: " fields carry the
+# JSON payload, ":" starts a comment (the server's pings) and a lone "\r" is the rest
+# of a CRLF blank line. A handler returns the JSON bytes, or None to skip the line.
+_SSE_DISPATCH = [_sse_payload] * 256
+_SSE_DISPATCH[_DATA[0]] = _sse_data
+_SSE_DISPATCH[_COMMENT[0]] = _sse_skip
+_SSE_DISPATCH[_CR[0]] = _sse_skip
+
+
+def _iter_lines(chunks):
+    """Split a stream of byte chunks into lines without decoding them"""
+    # One buffer for the whole stream; consumed lines are dropped from its front
+    buf = bytearray()
+    for chunk in chunks:
+        buf += chunk
+        start = 0
+        with memoryview(buf) as view:
+            while (end := buf.find(b"\n", start)) != -1:
+                yield bytes(view[start:end])
+                start = end + 1
+        del buf[:start]
+    if buf:
+        yield bytes(buf)
+
 
 # Function to send a query to the backend and get the response
 def get_response(query):
     # Prepare the input data
     data = {"inputs": query}
 
-    # Send the request to the backend
-    response = requests.post(url, headers=headers, data=json.dumps(data), timeout=20, stream=True)
-
-    # Process the streaming response
-    for chunk in response.iter_lines(chunk_size=8192, decode_unicode=False, delimiter=b"\n"):
-        if chunk:
-            decoded = chunk.decode("utf-8")
-            if decoded == "\r":
+    # Send the request to the backend and process the streaming response
+    with httpx.stream("POST", url, headers=headers, json=data, timeout=20.0) as response:
+        for chunk in _iter_lines(response.iter_bytes(65536)):
+            if not chunk:
                 continue
-            if decoded[:6] == "data: ":
-                decoded = decoded[6:]
-            elif decoded.startswith(": ping - "):
+            payload = _SSE_DISPATCH[chunk[0]](chunk)
+            if payload is None:
                 continue
-            response_data = json.loads(decoded)
+            response_data = _loads(payload)
             logger.debug(f"Raw response: {response_data}")
 
             agent_return = response_data.get("response", {})
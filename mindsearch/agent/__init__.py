@@ -1,6 +1,7 @@
+import logging
 import os
-from copy import deepcopy
 from datetime import datetime
+from functools import lru_cache
 
 from lagent.actions import AsyncWebBrowser, WebBrowser
 from lagent.agents.stream import get_plugin_prompt
@@ -23,6 +24,46 @@ from .mindsearch_prompt import (
 )
 
 LLM = {}
+_TEMPLATES = {
+    "en": dict(
+        graph=GRAPH_PROMPT_EN,
+        final=FINAL_RESPONSE_EN,
+        sys=searcher_system_prompt_en,
+        inp=searcher_input_template_en,
+        ctx=searcher_context_template_en,
+    ),
+    "cn": dict(
+        graph=GRAPH_PROMPT_CN,
+        final=FINAL_RESPONSE_CN,
+        sys=searcher_system_prompt_cn,
+        inp=searcher_input_template_cn,
+        ctx=searcher_context_template_cn,
+    ),
+}
+_DATE_CACHE = (None, None)
+
+
+@lru_cache(maxsize=4)
+def _build_llm_cfg(model_format, use_async):
+    """Resolve the LLM config once per (model_format, use_async)."""
+    llm_cfg = getattr(llm_factory, model_format, None)
+    if llm_cfg is None:
+        raise NotImplementedError(f"Model {model_format} not found")
+    if not use_async:
+        return dict(llm_cfg)
+    cls_name = (
+        llm_cfg["type"].split(".")[-1] if isinstance(
+            llm_cfg["type"], str) else llm_cfg["type"].__name__)
+    return {**llm_cfg, "type": f"lagent.llms.Async{cls_name}"}
+
+
+def _current_date_prompt():
+    """Format the date prompt, reformatting only when the day changes."""
+    global _DATE_CACHE
+    today = datetime.now().date()
+    if _DATE_CACHE[0] != today:
+        _DATE_CACHE = (today, today.strftime("The current date is %Y-%m-%d."))
+    return _DATE_CACHE[1]
 
 
 def init_agent(lang="en", use_async=False):
@@ -34,18 +75,11 @@ def init_agent(lang="en", use_async=False):
 
     llm = LLM.get(model_format, {}).get(mode)
     if llm is None:
-        llm_cfg = deepcopy(getattr(llm_factory, model_format))
-        if llm_cfg is None:
-            raise NotImplementedError(f"Model {model_format} not found")
-        if use_async:
-            cls_name = (
-                llm_cfg["type"].split(".")[-1] if isinstance(
-                    llm_cfg["type"], str) else llm_cfg["type"].__name__)
-            llm_cfg["type"] = f"lagent.llms.Async{cls_name}"
-        llm = create_object(llm_cfg)
+        # create_object gets its own copy so the cached config is never mutated
+        llm = create_object(dict(_build_llm_cfg(model_format, use_async)))
         LLM.setdefault(model_format, {}).setdefault(mode, llm)
 
-    date = datetime.now().strftime("The current date is %Y-%m-%d.")
+    date = _current_date_prompt()
 
     # Hardcoded to use GoogleSearch with Serper API
     api_key = os.getenv("WEB_SEARCH_API_KEY")
@@ -66,27 +100,27 @@ def init_agent(lang="en", use_async=False):
         )]
 
     logging.info("✅ Simplified MindSearch: OpenAI GPT-4 + Serper API initialized")
+    # Any language other than "cn" falls back to the English prompts
+    tpl = _TEMPLATES.get(lang, _TEMPLATES["en"])
     agent = (AsyncMindSearchAgent if use_async else MindSearchAgent)(
         llm=llm,
         template=date,
-        output_format=InterpreterParser(
-            template=GRAPH_PROMPT_CN if lang == "cn" else GRAPH_PROMPT_EN),
+        output_format=InterpreterParser(template=tpl["graph"]),
         searcher_cfg=dict(
             llm=llm,
             plugins=plugins,
             template=date,
             output_format=PluginParser(
-                template=searcher_system_prompt_cn
-                if lang == "cn" else searcher_system_prompt_en,
+                template=tpl["sys"],
                 tool_info=get_plugin_prompt(plugins),
             ),
-            user_input_template=(searcher_input_template_cn if lang == "cn"
-                                 else searcher_input_template_en),
-            user_context_template=(searcher_context_template_cn if lang == "cn"
-                                   else searcher_context_template_en),
+            user_input_template=tpl["inp"],
+            user_context_template=tpl["ctx"],
         ),
-        summary_prompt=FINAL_RESPONSE_CN
-        if lang == "cn" else FINAL_RESPONSE_EN,
+        summary_prompt=tpl["final"],
         max_turn=10,
+        # The async endpoint serializes each message before pulling the next one,
+        # while the sync one hands messages to another thread through a queue
+        copy_on_yield=not use_async,
     )
     return agent
@@ -8,7 +8,12 @@ from lagent.schema import AgentMessage, AgentStatusCode, ModelStatusCode
 from lagent.utils import GeneratorWithReturn
 
 from .graph import ExecutionAction, WebSearchGraph
-from .streaming import AsyncStreamingAgentForInternLM, StreamingAgentForInternLM
+from .streaming import (
+    _TOOL_CALL_STATES,
+    _TOOL_STREAM_STATE,
+    AsyncStreamingAgentForInternLM,
+    StreamingAgentForInternLM,
+)
 
 
 def _update_ref(ref: str, ref2url: Dict[str, str], ptr: int) -> str:
@@ -74,20 +79,16 @@ class MindSearchAgent(StreamingAgentForInternLM):
         for _ in range(self.max_turn):
             last_agent_state = AgentStatusCode.SESSION_READY
             for message in self.agent(message, session_id=session_id, **kwargs):
-                if isinstance(message.formatted, dict) and message.formatted.get("tool_type"):
+                formatted = message.formatted
+                tool_type = formatted.get("tool_type") if formatted.__class__ is dict else None
+                if tool_type:
                     if message.stream_state == ModelStatusCode.END:
                         message.stream_state = last_agent_state + int(
-                            last_agent_state
-                            in [
-                                AgentStatusCode.CODING,
-                                AgentStatusCode.PLUGIN_START,
-                            ]
+                            last_agent_state in _TOOL_CALL_STATES
                         )
                     else:
-                        message.stream_state = (
-                            AgentStatusCode.PLUGIN_START
-                            if message.formatted["tool_type"] == "plugin"
-                            else AgentStatusCode.CODING
+                        message.stream_state = _TOOL_STREAM_STATE.get(
+                            tool_type, AgentStatusCode.CODING
                         )
                 else:
                     message.stream_state = AgentStatusCode.STREAM_ING
@@ -154,20 +155,16 @@ class AsyncMindSearchAgent(AsyncStreamingAgentForInternLM):
         for _ in range(self.max_turn):
             last_agent_state = AgentStatusCode.SESSION_READY
             async for message in self.agent(message, session_id=session_id, **kwargs):
-                if isinstance(message.formatted, dict) and message.formatted.get("tool_type"):
+                formatted = message.formatted
+                tool_type = formatted.get("tool_type") if formatted.__class__ is dict else None
+                if tool_type:
                     if message.stream_state == ModelStatusCode.END:
                         message.stream_state = last_agent_state + int(
-                            last_agent_state
-                            in [
-                                AgentStatusCode.CODING,
-                                AgentStatusCode.PLUGIN_START,
-                            ]
+                            last_agent_state in _TOOL_CALL_STATES
                         )
                     else:
-                        message.stream_state = (
-                            AgentStatusCode.PLUGIN_START
-                            if message.formatted["tool_type"] == "plugin"
-                            else AgentStatusCode.CODING
+                        message.stream_state = _TOOL_STREAM_STATE.get(
+                            tool_type, AgentStatusCode.CODING
                         )
                 else:
                     message.stream_state = AgentStatusCode.STREAM_ING
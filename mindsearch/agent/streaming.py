@@ -1,16 +1,50 @@
-import copy
+import logging
 from typing import List, Union
 
 from lagent.agents import Agent, AgentForInternLM, AsyncAgent, AsyncAgentForInternLM
 from lagent.schema import AgentMessage, AgentStatusCode, ModelStatusCode
 
+# Stream state of a message that calls a tool; any tool other than a plugin is code
+_TOOL_STREAM_STATE = {"plugin": AgentStatusCode.PLUGIN_START}
+_TOOL_CALL_STATES = frozenset({AgentStatusCode.CODING, AgentStatusCode.PLUGIN_START})
+_TOOL_TYPES = ("plugin", "interpreter")
+
+
+def _clone_msg(message: AgentMessage) -> AgentMessage:
+    """Shallow copy of a message that skips pydantic validation."""
+    return AgentMessage.model_construct(**message.__dict__)
+
+
+def _clone_input(message: tuple) -> tuple:
+    """Copy the messages handed to ``before_agent`` hooks so they cannot alter the caller's."""
+    cloned = []
+    for m in message:
+        if isinstance(m, AgentMessage):
+            m = _clone_msg(m)
+        elif isinstance(m, list):
+            m = [_clone_msg(x) if isinstance(x, AgentMessage) else x for x in m]
+        cloned.append(m)
+    return tuple(cloned)
+
 
 class StreamingAgentMixin:
-    """Make agent calling output a streaming response."""
+    """Make agent calling output a streaming response.
+
+    Args:
+        copy_on_yield (bool): Yield a copy of every streamed message. Consumers that
+            serialize each message before requesting the next one can pass ``False``
+            to skip the per-token copy. Defaults to ``True``.
+    """
+
+    def __init__(self, *args, copy_on_yield: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.copy_on_yield = copy_on_yield
 
     def __call__(self, *message: Union[AgentMessage, List[AgentMessage]], session_id=0, **kwargs):
-        for hook in self._hooks.values():
-            message = copy.deepcopy(message)
+        # Snapshot the hooks once; most agents have none, so both loops are then free
+        hooks = tuple(self._hooks.values())
+        for hook in hooks:
+            message = _clone_input(message)
             result = hook.before_agent(self, message, session_id)
             if result:
                 message = result
@@ -24,10 +58,10 @@ class StreamingAgentMixin:
                     content=response,
                     stream_state=model_state,
                 )
-            yield response_message.model_copy()
+            yield response_message.model_copy() if self.copy_on_yield else response_message
         self.update_memory(response_message, session_id=session_id)
-        for hook in self._hooks.values():
-            response_message = response_message.model_copy(deep=True)
+        for hook in hooks:
+            response_message = _clone_msg(response_message)
             result = hook.after_agent(self, response_message, session_id)
             if result:
                 response_message = result
@@ -35,13 +69,25 @@ class StreamingAgentMixin:
 
 
 class AsyncStreamingAgentMixin:
-    """Make asynchronous agent calling output a streaming response."""
+    """Make asynchronous agent calling output a streaming response.
+
+    Args:
+        copy_on_yield (bool): Yield a copy of every streamed message. Consumers that
+            serialize each message before requesting the next one can pass ``False``
+            to skip the per-token copy. Defaults to ``True``.
+    """
+
+    def __init__(self, *args, copy_on_yield: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.copy_on_yield = copy_on_yield
 
     async def __call__(
         self, *message: Union[AgentMessage, List[AgentMessage]], session_id=0, **kwargs
     ):
-        for hook in self._hooks.values():
-            message = copy.deepcopy(message)
+        # Snapshot the hooks once; most agents have none, so both loops are then free
+        hooks = tuple(self._hooks.values())
+        for hook in hooks:
+            message = _clone_input(message)
             result = hook.before_agent(self, message, session_id)
             if result:
                 message = result
@@ -55,10 +101,10 @@ class AsyncStreamingAgentMixin:
                     content=response,
                     stream_state=model_state,
                 )
-            yield response_message.model_copy()
+            yield response_message.model_copy() if self.copy_on_yield else response_message
         self.update_memory(response_message, session_id=session_id)
-        for hook in self._hooks.values():
-            response_message = response_message.model_copy(deep=True)
+        for hook in hooks:
+            response_message = _clone_msg(response_message)
             result = hook.after_agent(self, response_message, session_id)
             if result:
                 response_message = result
@@ -139,26 +185,29 @@ class StreamingAgentForInternLM(StreamingAgentMixin, AgentForInternLM):
             if not hasattr(self.agent, 'interpreter_executor'):
                 self.agent.interpreter_executor = None
 
+        # Resolve the tool executors once instead of formatting an attribute name per call
+        self._executor_map = {
+            tool_type: executor
+            for tool_type in _TOOL_TYPES
+            if (executor := getattr(self, f"{tool_type}_executor", None))
+        }
+
     def forward(self, message: AgentMessage, session_id=0, **kwargs):
         if isinstance(message, str):
             message = AgentMessage(sender="user", content=message)
         for _ in range(self.max_turn):
             last_agent_state = AgentStatusCode.SESSION_READY
             for message in self.agent(message, session_id=session_id, **kwargs):
-                if isinstance(message.formatted, dict) and message.formatted.get("tool_type"):
+                formatted = message.formatted
+                tool_type = formatted.get("tool_type") if formatted.__class__ is dict else None
+                if tool_type:
                     if message.stream_state == ModelStatusCode.END:
                         message.stream_state = last_agent_state + int(
-                            last_agent_state
-                            in [
-                                AgentStatusCode.CODING,
-                                AgentStatusCode.PLUGIN_START,
-                            ]
+                            last_agent_state in _TOOL_CALL_STATES
                         )
                     else:
-                        message.stream_state = (
-                            AgentStatusCode.PLUGIN_START
-                            if message.formatted["tool_type"] == "plugin"
-                            else AgentStatusCode.CODING
+                        message.stream_state = _TOOL_STREAM_STATE.get(
+                            tool_type, AgentStatusCode.CODING
                         )
                 else:
                     message.stream_state = AgentStatusCode.STREAM_ING
@@ -170,7 +219,7 @@ class StreamingAgentForInternLM(StreamingAgentMixin, AgentForInternLM):
                 return
             if message.formatted["tool_type"]:
                 tool_type = message.formatted["tool_type"]
-                executor = getattr(self, f"{tool_type}_executor", None)
+                executor = self._executor_map.get(tool_type)
                 if not executor:
                     raise RuntimeError(f"No available {tool_type} executor")
                 tool_return = executor(message, session_id=session_id)
@@ -207,26 +256,29 @@ class AsyncStreamingAgentForInternLM(AsyncStreamingAgentMixin, AsyncAgentForInte
             if not hasattr(self.agent, 'interpreter_executor'):
                 self.agent.interpreter_executor = None
 
+        # Resolve the tool executors once instead of formatting an attribute name per call
+        self._executor_map = {
+            tool_type: executor
+            for tool_type in _TOOL_TYPES
+            if (executor := getattr(self, f"{tool_type}_executor", None))
+        }
+
     async def forward(self, message: AgentMessage, session_id=0, **kwargs):
         if isinstance(message, str):
             message = AgentMessage(sender="user", content=message)
         for _ in range(self.max_turn):
             last_agent_state = AgentStatusCode.SESSION_READY
             async for message in self.agent(message, session_id=session_id, **kwargs):
-                if isinstance(message.formatted, dict) and message.formatted.get("tool_type"):
+                formatted = message.formatted
+                tool_type = formatted.get("tool_type") if formatted.__class__ is dict else None
+                if tool_type:
                     if message.stream_state == ModelStatusCode.END:
                         message.stream_state = last_agent_state + int(
-                            last_agent_state
-                            in [
-                                AgentStatusCode.CODING,
-                                AgentStatusCode.PLUGIN_START,
-                            ]
+                            last_agent_state in _TOOL_CALL_STATES
                         )
                     else:
-                        message.stream_state = (
-                            AgentStatusCode.PLUGIN_START
-                            if message.formatted["tool_type"] == "plugin"
-                            else AgentStatusCode.CODING
+                        message.stream_state = _TOOL_STREAM_STATE.get(
+                            tool_type, AgentStatusCode.CODING
                         )
                 else:
                     message.stream_state = AgentStatusCode.STREAM_ING
@@ -238,7 +290,7 @@ class AsyncStreamingAgentForInternLM(AsyncStreamingAgentMixin, AsyncAgentForInte
                 return
             if message.formatted["tool_type"]:
                 tool_type = message.formatted["tool_type"]
-                executor = getattr(self, f"{tool_type}_executor", None)
+                executor = self._executor_map.get(tool_type)
                 if not executor:
                     raise RuntimeError(f"No available {tool_type} executor")
                 tool_return = await executor(message, session_id=session_id)
@@ -4,23 +4,287 @@ Research File Collector for MindSearch
 Saves all streaming output as it gets collected for analysis
 """
 
+import asyncio
 import json
-import requests
+import multiprocessing as mp
+import re
+from queue import Empty, Full
+import httpx
 import time
 from datetime import datetime
 import os
 from pathlib import Path
 
+from _sse_loop import SseState, process_frame
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib codec
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, the raw stream is then stored uncompressed
+    zstandard = None
+
+
+# Session files are flushed to disk at most this often (seconds) while streaming
+FLUSH_INTERVAL = 5.0
+WRITE_BUFFER_SIZE = 1 << 20
+# Raw frames are collected in user space and handed to os.write in blocks this large
+RAW_FLUSH_SIZE = 1 << 20
+# zstd level for raw_stream.jsonl.zst; the repeated graph JSON compresses very well
+RAW_ZSTD_LEVEL = 3
+# The stream is read in chunks this large and split into SSE events by hand
+READ_CHUNK_SIZE = 1 << 16
+# SSE data field prefix, and the blank line / line break that frame events (LF or CRLF)
+_DATA = b"data: "
+_DATA_LEN = len(_DATA)
+_EVENT_END = re.compile(rb"\r?\n\r?\n")
+_LINE_END = re.compile(rb"\r?\n")
+# Payloads the reader may get ahead of the writer process before it waits
+PAYLOAD_QUEUE_SIZE = 1024
+# How often (seconds) a wait on the writer process checks that it is still alive
+WRITER_POLL_INTERVAL = 0.5
+
+
+def _loads(data):
+    """Parse a JSON document from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj):
+    """Serialize an object to indented JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode("utf-8")
+
+
+def _write_all(fd, data):
+    """os.write every byte of data, retrying after a short write"""
+    written = os.write(fd, data)
+    while written < len(data):
+        written += os.write(fd, data[written:])
+
+
+def _write_file(path, data):
+    """Replace a file's contents with a single unbuffered write"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _write_all(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _drain(fd, buf, compressor=None):
+    """Write out and clear a frame buffer, compressing it first when given a zstd compressor"""
+    _write_all(fd, compressor.compress(buf) if compressor is not None else buf)
+    buf.clear()
+
+
+def _sse_event_data(event):
+    """Data of a multi-line SSE event as one line; None if it has no data lines"""
+    lines = [line for line in _LINE_END.split(event) if line.startswith(b"data:")]
+    if not lines:
+        return None
+    # SSE joins data lines with newlines, but each payload is stored as a single
+    # raw_stream.jsonl record. A raw newline in JSON can only be whitespace between
+    # tokens, so a space parses the same
+    return b" ".join(
+        line[_DATA_LEN:] if line.startswith(_DATA) else line[5:] for line in lines
+    )
+
+
+def _write_frames(queue, files, header):
+    """Parse queued payloads into the session files until the None sentinel"""
+    raw_stream_file, formatted_output_file, graph_evolution_file = files
+    
+    # Raw frames and thought lines skip the file object layers: plain fds fed
+    # from our own buffers
+    raw_fd = os.open(raw_stream_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    formatted_fd = os.open(formatted_output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    raw_buf = bytearray()
+    compressor = None
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=RAW_ZSTD_LEVEL, threads=2).compressobj()
+    formatted_buf = bytearray(header)
+    try:
+        # Large buffers and an interval flush instead of a flush per frame; the
+        # finally block still writes everything out if the stream fails midway
+        with open(graph_evolution_file, 'wb', buffering=WRITE_BUFFER_SIZE) as graph_file:
+            
+            # Stream state; frames and graph deltas go straight to disk
+            state = SseState(graph_file.write, formatted_buf, {})
+            
+            last_flush = time.monotonic()
+            writer_error = None
+            try:
+                while (payload := queue.get()) is not None:
+                    now = time.monotonic()
+                    if now - last_flush > FLUSH_INTERVAL:
+                        _drain(raw_fd, raw_buf, compressor)
+                        if compressor is not None:
+                            # Close the current zstd block so everything so far is
+                            # decodable from disk, not held inside the compressor
+                            _write_all(raw_fd, compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK))
+                        _drain(formatted_fd, formatted_buf)
+                        graph_file.flush()
+                        last_flush = now
+                    
+                    try:
+                        data = _loads(payload)
+                    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+                    except json.JSONDecodeError as e:
+                        print(f"⚠️  JSON decode error: {e}")
+                        continue
+                    
+                    # Save raw response exactly as received, no re-encoding
+                    raw_buf += payload
+                    raw_buf += b"\n"
+                    
+                    # A frame that cannot be processed only loses its own fields; its
+                    # raw bytes are kept and the stream carries on
+                    try:
+                        process_frame(data, state)
+                    except Exception as e:
+                        print(f"⚠️  Processing error: {e}")
+                    
+                    if len(raw_buf) >= RAW_FLUSH_SIZE:
+                        _drain(raw_fd, raw_buf, compressor)
+                    if len(formatted_buf) >= WRITE_BUFFER_SIZE:
+                        _drain(formatted_fd, formatted_buf)
+            except Exception as e:
+                # Writing failed: report what was collected so far, marked as
+                # incomplete, and keep draining so the reader never blocks on a full queue
+                print(f"❌ Writer error: {e}")
+                writer_error = str(e)
+                while queue.get() is not None:
+                    pass
+    
+    finally:
+        _drain(raw_fd, raw_buf, compressor)
+        if compressor is not None:
+            _write_all(raw_fd, compressor.flush())
+        os.close(raw_fd)
+        _drain(formatted_fd, formatted_buf)
+        os.close(formatted_fd)
+    
+    summary = {
+        "total_responses": state.total,
+        "unique_nodes": sorted(state.unique_nodes),
+        "final_graph": state.final_graph,
+        "references": state.references,
+    }
+    if writer_error is not None:
+        summary["writer_error"] = writer_error
+    return summary
+
+
+def _write_session(queue, results, files, header):
+    """
+    Writer process entry point: write the session files, then put the stream
+    summary on results (None if the files could not be set up)
+    """
+    try:
+        results.put(_write_frames(queue, files, header))
+    except Exception as e:
+        print(f"❌ Writer error: {e}")
+        # Keep draining so the reader never blocks on a full queue
+        while queue.get() is not None:
+            pass
+        results.put(None)
+
+
+def _put_while_alive(queue, item, writer):
+    """queue.put that raises RuntimeError instead of waiting on a writer that has exited"""
+    while True:
+        try:
+            queue.put(item, timeout=WRITER_POLL_INTERVAL)
+            return
+        except Full:
+            if not writer.is_alive():
+                raise RuntimeError(f"writer process exited with code {writer.exitcode}")
+
+
+def _finish_writer(queue, results, writer):
+    """Send the writer its sentinel and wait for its summary; None if the writer died"""
+    try:
+        _put_while_alive(queue, None, writer)
+    except RuntimeError:
+        return None
+    while True:
+        try:
+            summary = results.get(timeout=WRITER_POLL_INTERVAL)
+            break
+        except Empty:
+            if not writer.is_alive():
+                # A result put right before exiting is already in the pipe
+                try:
+                    summary = results.get_nowait()
+                except Empty:
+                    summary = None
+                break
+    writer.join()
+    return summary
+
+
 class ResearchCollector:
     def __init__(self, base_url="http://localhost:8005", output_dir="research_outputs"):
         self.base_url = base_url
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
+    async def _iter_sse_payloads(self, response):
+        """Yield the data of every SSE event as raw bytes"""
+        buf = bytearray()
+        async for chunk in response.aiter_bytes(READ_CHUNK_SIZE):
+            buf += chunk
+            start = 0
+            with memoryview(buf) as view:
+                while (match := _EVENT_END.search(buf, start)) is not None:
+                    end = match.start()
+                    # The usual event is a single data line: compared in place and
+                    # copied out once. Pings and other comment-only events yield nothing
+                    if buf.startswith(_DATA, start) and buf.find(b"\n", start, end) == -1:
+                        yield bytes(view[start + _DATA_LEN:end])
+                    else:
+                        data = _sse_event_data(bytes(view[start:end]))
+                        if data is not None:
+                            yield data
+                    start = match.end()
+            del buf[:start]
+    
+    async def _read_stream(self, query, queue, writer):
+        """Stream the /solve response and queue every payload up to [DONE]"""
+        async with httpx.AsyncClient(timeout=300) as client:
+            async with client.stream(
+                "POST", f"{self.base_url}/solve", json={"inputs": query}
+            ) as response:
+                response.raise_for_status()
+                print("🌊 Streaming started...")
+                async for payload in self._iter_sse_payloads(response):
+                    if payload.strip() == b'[DONE]':
+                        break
+                    try:
+                        queue.put_nowait(payload)
+                    except Full:
+                        # The writer is a full queue behind: wait for it off the event loop
+                        await asyncio.to_thread(_put_while_alive, queue, payload, writer)
+    
     def collect_research(self, query, session_name=None):
         """
         Collect all streaming output from a research query
+
+        Frames are written by a process started with the spawn method, which
+        re-imports the calling script: scripts calling this need an
+        ``if __name__ == "__main__":`` guard.
         """
+        return asyncio.run(self._collect_research(query, session_name))
+    
+    async def _collect_research(self, query, session_name):
+        """Read the stream here while a writer process parses and saves the frames"""
         if session_name is None:
             session_name = f"research_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
@@ -34,9 +298,11 @@ class ResearchCollector:
         print("=" * 80)
         
         # Files to save different aspects
-        raw_stream_file = session_dir / "raw_stream.jsonl"
+        raw_stream_file = session_dir / (
+            "raw_stream.jsonl.zst" if zstandard is not None else "raw_stream.jsonl"
+        )
         formatted_output_file = session_dir / "formatted_output.txt"
-        graph_evolution_file = session_dir / "graph_evolution.json"
+        graph_evolution_file = session_dir / "graph_evolution.jsonl"
         metadata_file = session_dir / "metadata.json"
         
         # Metadata
@@ -51,108 +317,45 @@ class ResearchCollector:
             "references": {}
         }
         
-        # Collections
-        all_responses = []
-        graph_states = []
-        current_thought = ""
+        # Parsing and file writes run in a separate process fed through a bounded
+        # queue, so the stream is read while earlier frames are still being handled
+        ctx = mp.get_context("spawn")
+        queue = ctx.Queue(maxsize=PAYLOAD_QUEUE_SIZE)
+        results = ctx.Queue()
+        header = (
+            f"Research Session: {session_name}\n"
+            f"Query: {query}\n"
+            f"Started: {metadata['start_time']}\n"
+            + "=" * 80 + "\n\n"
+        ).encode("utf-8")
+        writer = ctx.Process(
+            target=_write_session,
+            args=(queue, results, (raw_stream_file, formatted_output_file, graph_evolution_file), header),
+            daemon=True,
+        )
         
         try:
-            # Make the streaming request
-            response = requests.post(
-                f"{self.base_url}/solve",
-                json={"inputs": query},
-                stream=True,
-                timeout=300
-            )
-            response.raise_for_status()
-            
-            print("🌊 Streaming started...")
-            
-            with open(raw_stream_file, 'w') as raw_file, \
-                 open(formatted_output_file, 'w') as formatted_file:
-                
-                # Write headers
-                formatted_file.write(f"Research Session: {session_name}\n")
-                formatted_file.write(f"Query: {query}\n")
-                formatted_file.write(f"Started: {metadata['start_time']}\n")
-                formatted_file.write("=" * 80 + "\n\n")
-                
-                for line in response.iter_lines():
-                    if line:
-                        try:
-                            # Parse the streaming response
-                            line_str = line.decode('utf-8')
-                            if line_str.startswith('data: '):
-                                json_str = line_str[6:]  # Remove 'data: ' prefix
-                                if json_str.strip() == '[DONE]':
-                                    break
-                                
-                                data = json.loads(json_str)
-                                all_responses.append(data)
-                                metadata["total_responses"] += 1
-                                
-                                # Save raw response
-                                raw_file.write(json.dumps(data) + "\n")
-                                raw_file.flush()
-                                
-                                # Extract useful info
-                                if 'response' in data and data['response']:
-                                    resp = data['response']
-                                    formatted_data = resp.get('formatted', {})
-                                    
-                                    # Track graph evolution
-                                    if 'adjacency_list' in formatted_data:
-                                        adj_list = formatted_data['adjacency_list']
-                                        if adj_list and adj_list != metadata.get("final_graph"):
-                                            metadata["final_graph"] = adj_list
-                                            metadata["unique_nodes"].update(adj_list.keys())
-                                            graph_states.append({
-                                                "timestamp": datetime.now().isoformat(),
-                                                "response_count": metadata["total_responses"],
-                                                "adjacency_list": adj_list
-                                            })
-                                    
-                                    # Track references
-                                    if 'ref2url' in formatted_data:
-                                        ref2url = formatted_data['ref2url']
-                                        if ref2url:
-                                            metadata["references"].update(ref2url)
-                                    
-                                    # Build thought stream
-                                    if 'thought' in formatted_data:
-                                        new_thought = formatted_data['thought']
-                                        if new_thought and new_thought != current_thought:
-                                            current_thought = new_thought
-                                            
-                                            # Write formatted output
-                                            formatted_file.write(f"[{metadata['total_responses']:04d}] ")
-                                            if 'tool_type' in formatted_data and formatted_data['tool_type']:
-                                                formatted_file.write(f"[{formatted_data['tool_type']}] ")
-                                            formatted_file.write(f"{new_thought}\n")
-                                            formatted_file.flush()
-                                            
-                                            # Print progress
-                                            if metadata["total_responses"] % 50 == 0:
-                                                print(f"📊 Collected {metadata['total_responses']} responses...")
-                                
-                        except json.JSONDecodeError as e:
-                            print(f"⚠️  JSON decode error: {e}")
-                            continue
-                        except Exception as e:
-                            print(f"⚠️  Processing error: {e}")
-                            continue
+            writer.start()
+            try:
+                await self._read_stream(query, queue, writer)
+            finally:
+                # The writer still finishes the files if the stream failed midway
+                summary = await asyncio.to_thread(_finish_writer, queue, results, writer)
+            if summary is None:
+                raise RuntimeError(f"writer process failed (exit code {writer.exitcode})")
             
             # Finalize metadata
+            metadata.update(summary)
             metadata["end_time"] = datetime.now().isoformat()
-            metadata["unique_nodes"] = list(metadata["unique_nodes"])
             
-            # Save graph evolution
-            with open(graph_evolution_file, 'w') as graph_file:
-                json.dump(graph_states, graph_file, indent=2)
+            # Save metadata; every value is plain JSON by now (unique_nodes is a
+            # sorted list), so it is serialized once and written in one call
+            _write_file(metadata_file, _dumps(metadata))
             
-            # Save metadata
-            with open(metadata_file, 'w') as meta_file:
-                json.dump(metadata, meta_file, indent=2)
+            if "writer_error" in metadata:
+                print(f"❌ Collection incomplete, writing stopped early: {metadata['writer_error']}")
+                print(f"📁 Partial files saved in: {session_dir}")
+                return None
             
             print("\n" + "=" * 80)
             print(f"✅ Research collection complete!")
@@ -172,7 +375,7 @@ class ResearchCollector:
                 }
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"❌ Request error: {e}")
             return None
         except Exception as e: